@@ -21,15 +21,32 @@ OUTPUT:
 """
 
 import sqlite3
+import csv
 import json
+import heapq
+import functools
 import pandas as pd
 from collections import defaultdict
 
+@functools.lru_cache(maxsize=4096)
+def _author_tokens(authors_json):
+    """Parse an authors JSON blob into its user tokens, memoized on the raw string.
+
+    Co-authored agents repeat the exact same authors blob, so caching on the
+    raw string means each unique author set is parsed only once.
+    """
+    try:
+        return tuple(json.loads(authors_json).keys())
+    except json.JSONDecodeError:
+        return ()
+
 def load_exclusion_list():
     """Load the paid traffic agents exclusion list."""
     try:
-        df = pd.read_csv('paid_traffic_exclusion_list.csv')
-        return set(df['agent_id'].tolist())
+        # Plain csv module - no need to spin up pandas for a single column
+        with open('paid_traffic_exclusion_list.csv', newline='') as f:
+            reader = csv.DictReader(f)
+            return {row['agent_id'] for row in reader}
     except FileNotFoundError:
         print("❌ Exclusion list not found. Please run find_paid_traffic_agents.py first.")
         return set()
@@ -49,7 +66,14 @@ def analyze_group_c():
     db_path = 'data/agents.db'
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
+
+    # Partial index so the repeated status='public' scans don't walk the whole table
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_agents_public
+        ON agents(agent_id) WHERE status = 'public'
+    """)
+    conn.commit()
+
     print("\n🔍 Analyzing Group C (Public Agents Excluding Paid Traffic)")
     print("=" * 80)
     
@@ -115,19 +139,15 @@ def analyze_group_c():
             total_weighted_rating += (reviews_score or 0) * reviews_count
         
         if authors_json:
-            try:
-                authors = json.loads(authors_json)
-                for user_token in authors.keys():
-                    group_c_builders.add(user_token)
-                    builder_stats[user_token]['agent_count'] += 1
-                    builder_stats[user_token]['total_executions'] += executions or 0
-                    builder_stats[user_token]['total_reviews'] += reviews_count or 0
-                    if reviews_count and reviews_count > 0:
-                        builder_stats[user_token]['total_weighted_rating'] += (reviews_score or 0) * reviews_count
-                    builder_stats[user_token]['agent_ids'].append(agent_id)
-                    builder_stats[user_token]['agent_names'].append(name or 'Unnamed')
-            except json.JSONDecodeError:
-                continue
+            for user_token in _author_tokens(authors_json):
+                group_c_builders.add(user_token)
+                builder_stats[user_token]['agent_count'] += 1
+                builder_stats[user_token]['total_executions'] += executions or 0
+                builder_stats[user_token]['total_reviews'] += reviews_count or 0
+                if reviews_count and reviews_count > 0:
+                    builder_stats[user_token]['total_weighted_rating'] += (reviews_score or 0) * reviews_count
+                builder_stats[user_token]['agent_ids'].append(agent_id)
+                builder_stats[user_token]['agent_names'].append(name or 'Unnamed')
     
     print(f"Found {len(group_c_builders)} unique Group C builders")
     
@@ -169,24 +189,20 @@ def analyze_group_c():
     
     for (authors_json,) in group_b_authors:
         if authors_json:
-            try:
-                authors = json.loads(authors_json)
-                for user_token in authors.keys():
-                    # Check if this agent is not in paid traffic exclusion list
-                    cursor.execute("SELECT agent_id FROM agents WHERE authors LIKE ? AND status = 'public'", 
-                                 (f'%{user_token}%',))
-                    user_agents = cursor.fetchall()
-                    
-                    has_non_excluded_agent = False
-                    for (agent_id,) in user_agents:
-                        if agent_id not in exclusion_list:
-                            has_non_excluded_agent = True
-                            break
-                    
-                    if has_non_excluded_agent:
-                        group_b_builders.add(user_token)
-            except json.JSONDecodeError:
-                continue
+            for user_token in _author_tokens(authors_json):
+                # Check if this agent is not in paid traffic exclusion list
+                cursor.execute("SELECT agent_id FROM agents WHERE authors LIKE ? AND status = 'public'",
+                             (f'%{user_token}%',))
+                user_agents = cursor.fetchall()
+
+                has_non_excluded_agent = False
+                for (agent_id,) in user_agents:
+                    if agent_id not in exclusion_list:
+                        has_non_excluded_agent = True
+                        break
+
+                if has_non_excluded_agent:
+                    group_b_builders.add(user_token)
     
     conn.close()
     
@@ -225,19 +241,22 @@ def analyze_group_c():
     print(f"\n🏆 TOP 15 GROUP C BUILDERS:")
     print("-" * 90)
     
-    # Sort builders by agent count
-    sorted_builders = sorted(builder_stats.items(), key=lambda x: x[1]['agent_count'], reverse=True)
-    
+    # Top 15 via nlargest - O(N log 15) instead of sorting every builder
+    top_builders = heapq.nlargest(15, builder_stats.items(), key=lambda x: x[1]['agent_count'])
+
     print(f"{'Rank':<5} {'User Token':<35} {'Agents':<8} {'Executions':<12} {'Avg Rating':<10}")
     print("-" * 90)
-    
-    for i, (user_token, stats) in enumerate(sorted_builders[:15], 1):
+
+    for i, (user_token, stats) in enumerate(top_builders, 1):
         avg_rating = (stats['total_weighted_rating'] / stats['total_reviews']) if stats['total_reviews'] > 0 else 0
         print(f"{i:<5} {user_token:<35} {stats['agent_count']:<8} {stats['total_executions']:<12,} {avg_rating:<10.2f}")
     
     # Step 7: Export Group C data
     print(f"\n📁 Exporting Group C data...")
     
+    # Full ranking is still needed for the CSV export, so sort once here
+    sorted_builders = sorted(builder_stats.items(), key=lambda x: x[1]['agent_count'], reverse=True)
+
     # Detailed builder summary
     summary_data = []
     for user_token, stats in sorted_builders:
@@ -34,28 +34,48 @@ REQUIREMENTS:
 
 import os
 import sys
+import csv
 import requests
 from dotenv import load_dotenv
 import argparse
 import sqlite3
-import pandas as pd
 import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Set
 import json
+
+# orjson parses the 100-contact search responses ~3x faster than stdlib
+# json; fall back silently when it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from pathlib import Path
+from functools import lru_cache
+import atexit
+import queue
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('hubspot_contact_lookup.log')
-    ]
-)
+# Configure logging through a queue so worker threads never block on
+# console/file writes; one background listener drains to both handlers
+_log_queue = queue.Queue(-1)
+_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_formatter)
+_file_handler = logging.FileHandler('hubspot_contact_lookup.log')
+_file_handler.setFormatter(_formatter)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
+_log_listener = QueueListener(_log_queue, _stream_handler, _file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -63,25 +83,49 @@ load_dotenv()
 HUB_API_KEY = os.getenv('HUB_API_KEY')
 HUB_ID = os.getenv('HUB_ID')
 
+@lru_cache(maxsize=1)
 def get_project_root():
     """Get the project root directory (where this script's parent directory is located)."""
     script_dir = Path(__file__).parent.absolute()
     # Go up one level from src/ to get to project root
     return script_dir.parent
 
+@lru_cache(maxsize=1)
 def get_db_path():
     """Get the correct database path relative to project root."""
     project_root = get_project_root()
     db_path = project_root / 'data' / 'agents.db'
     return str(db_path)
 
+def connect_db(db_path=None):
+    """Open a connection to agents.db with write-friendly pragmas.
+
+    The default journal mode fsyncs on every commit, which dominates this
+    upsert-heavy workload; WAL + synchronous=NORMAL batch those writes.
+    """
+    if db_path is None:
+        db_path = get_db_path()
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
 def initialize_users_table(db_path=None):
     if db_path is None:
         db_path = get_db_path()
     print(f"Initializing users table at: {db_path}")
-    conn = sqlite3.connect(db_path)
+    conn = connect_db(db_path)
     c = conn.cursor()
-    
+
+    # Schema version 2 = users table with nytw_status and agents columns.
+    # Warm invocations short-circuit on one PRAGMA instead of re-running
+    # the sqlite_master lookup and ALTER TABLE attempts every time.
+    if c.execute("PRAGMA user_version").fetchone()[0] >= 2:
+        conn.close()
+        return
+
     # First check if the table exists
     c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
     table_exists = c.fetchone() is not None
@@ -112,7 +156,8 @@ def initialize_users_table(db_path=None):
             logger.info("Added agents column to users table")
         except sqlite3.OperationalError:
             logger.info("agents column already exists")
-    
+
+    c.execute("PRAGMA user_version = 2")
     conn.commit()
     conn.close()
 
@@ -125,15 +170,21 @@ def get_existing_users_batch(user_tokens: List[str], db_path=None) -> Set[str]:
         db_path = get_db_path()
     
     print(f"Checking existing users in database: {db_path}")
-    conn = sqlite3.connect(db_path)
+    conn = connect_db(db_path)
     c = conn.cursor()
-    
-    # Create placeholders for IN clause
-    placeholders = ','.join('?' * len(user_tokens))
-    query = f"SELECT user_token FROM users WHERE user_token IN ({placeholders})"
-    
-    c.execute(query, user_tokens)
+
+    # Load tokens into a temp table and join against it rather than
+    # building a dynamic IN (?,?,...) list, which hits SQLite's variable
+    # limit on large CSVs and grows the SQL text with every token
+    c.execute("CREATE TEMP TABLE tmp_tokens (user_token TEXT PRIMARY KEY)")
+    c.executemany("INSERT OR IGNORE INTO tmp_tokens VALUES (?)", [(t,) for t in user_tokens])
+    c.execute("""
+        SELECT t.user_token
+        FROM tmp_tokens t
+        JOIN users u ON u.user_token = t.user_token
+    """)
     existing = {row[0] for row in c.fetchall()}
+    c.execute("DROP TABLE tmp_tokens")
     conn.close()
     return existing
 
@@ -146,27 +197,41 @@ def upsert_users_batch(users_data: List[Dict], db_path=None):
         db_path = get_db_path()
     
     print(f"Saving {len(users_data)} users to database: {db_path}")
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    for user_data in users_data:
-        c.execute('''
-            INSERT INTO users (user_token, email, firstname, lastname, agentai_platform_credits_balance)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(user_token) DO UPDATE SET
-                email=excluded.email,
-                firstname=excluded.firstname,
-                lastname=excluded.lastname,
-                agentai_platform_credits_balance=excluded.agentai_platform_credits_balance
-        ''', (
+    conn = connect_db(db_path)
+
+    rows = [
+        (
             user_data['user_token'],
             user_data.get('email'),
-            user_data.get('firstname'), 
+            user_data.get('firstname'),
             user_data.get('lastname'),
             user_data.get('agentai_platform_credits_balance')
-        ))
-    
-    conn.commit()
+        )
+        for user_data in users_data
+    ]
+
+    # Multi-row VALUES inserts amortize statement preparation across the
+    # batch; 199 rows x 5 columns stays under SQLite's 999-variable limit,
+    # and the whole run still commits as one transaction
+    with conn:
+        for start in range(0, len(rows), 199):
+            chunk = rows[start:start + 199]
+            placeholders = ",".join(["(?, ?, ?, ?, ?)"] * len(chunk))
+            flat_values = [value for row in chunk for value in row]
+            conn.execute(f'''
+                INSERT INTO users (user_token, email, firstname, lastname, agentai_platform_credits_balance)
+                VALUES {placeholders}
+                ON CONFLICT(user_token) DO UPDATE SET
+                    email=excluded.email,
+                    firstname=excluded.firstname,
+                    lastname=excluded.lastname,
+                    agentai_platform_credits_balance=excluded.agentai_platform_credits_balance
+                WHERE users.email IS NOT excluded.email
+                   OR users.firstname IS NOT excluded.firstname
+                   OR users.lastname IS NOT excluded.lastname
+                   OR users.agentai_platform_credits_balance IS NOT excluded.agentai_platform_credits_balance
+            ''', flat_values)
+
     conn.close()
 
 def log_error(error_log_path, message):
@@ -189,54 +254,79 @@ def create_session_with_retries():
     adapter = HTTPAdapter(max_retries=retry_strategy)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
-    
+
     return session
 
+class RateLimiter:
+    """Thread-safe sliding-window limiter for HubSpot's 100 req / 10 s cap."""
+
+    def __init__(self, max_rate=100, time_period=10.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._timestamps and now - self._timestamps[0] >= self.time_period:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < self.max_rate:
+                    self._timestamps.append(now)
+                    return
+                wait = self.time_period - (now - self._timestamps[0])
+            time.sleep(max(wait, 0.01))
+
+# Shared across worker threads: requests.Session is thread-safe and keeps
+# connections alive, and the limiter keeps the pool under HubSpot's burst cap
+_session = create_session_with_retries()
+_rate_limiter = RateLimiter(max_rate=100, time_period=10.0)
+
+# Static pieces of the search request, built once instead of per call
+_SEARCH_URL = "https://api.hubapi.com/crm/v3/objects/contacts/search"
+_SEARCH_PROPERTIES = [
+    "platform_user_token",
+    "email",
+    "firstname",
+    "lastname",
+    "agentai_platform_credits_balance"
+]
+
 def fetch_users_batch(user_tokens: List[str], error_log_path=None, batch_num=None, total_batches=None) -> List[Dict]:
     """Fetch multiple users from HubSpot in a single batch API call with retry logic."""
     if not user_tokens:
         return []
     
-    # HubSpot API limit: maximum 5 filterGroups per request
-    if len(user_tokens) > 5:
-        logger.warning(f"Batch size {len(user_tokens)} exceeds HubSpot limit of 5. Truncating to 5 users.")
-        user_tokens = user_tokens[:5]
-    
-    # Create session with retry logic
-    session = create_session_with_retries()
-    
+    # HubSpot search allows at most 100 values per IN filter (the limit max)
+    if len(user_tokens) > 100:
+        logger.warning(f"Batch size {len(user_tokens)} exceeds HubSpot limit of 100. Truncating to 100 users.")
+        user_tokens = user_tokens[:100]
+
     # HubSpot batch search API endpoint
     headers = {
         "Authorization": f"Bearer {HUB_API_KEY}",
         "Content-Type": "application/json"
     }
     
-    # Create batch request body
-    filter_groups = []
-    for token in user_tokens:
-        filter_groups.append({
-            "filters": [
-                {
-                    "propertyName": "platform_user_token",
-                    "operator": "EQ", 
-                    "value": token
-                }
-            ]
-        })
-    
-    search_url = "https://api.hubapi.com/crm/v3/objects/contacts/search"
-    
+    # One IN filter matches the whole batch in a single round-trip, instead
+    # of one filterGroup per token (which HubSpot caps at 5)
+    filter_groups = [{
+        "filters": [
+            {
+                "propertyName": "platform_user_token",
+                "operator": "IN",
+                "values": user_tokens
+            }
+        ]
+    }]
+
     body = {
         "filterGroups": filter_groups,
-        "properties": [
-            "platform_user_token",
-            "email",
-            "firstname", 
-            "lastname",
-            "agentai_platform_credits_balance"
-        ],
-        "limit": min(len(user_tokens), 5)  # Reduced to 5 per batch as requested
+        "properties": _SEARCH_PROPERTIES,
+        "limit": min(len(user_tokens), 100)
     }
+    payload = _json_dumps(body)
     
     batch_info = f"Batch {batch_num}/{total_batches}" if batch_num and total_batches else "Batch"
     logger.info(f"🔄 {batch_info}: Processing {len(user_tokens)} users")
@@ -245,7 +335,8 @@ def fetch_users_batch(user_tokens: List[str], error_log_path=None, batch_num=Non
     for attempt in range(max_attempts):
         try:
             logger.info(f"    🔄 {batch_info}: API call attempt {attempt + 1}/{max_attempts}")
-            response = session.post(search_url, headers=headers, json=body, timeout=30)
+            _rate_limiter.acquire()
+            response = _session.post(_SEARCH_URL, headers=headers, data=payload, timeout=30)
             
             if response.status_code == 401:
                 msg = f"[ERROR] Authentication failed for batch request. Check your HUB_API_KEY."
@@ -270,10 +361,21 @@ def fetch_users_batch(user_tokens: List[str], error_log_path=None, batch_num=Non
                         log_error(error_log_path, msg)
                     return []
             
-            # Success - process results
-            data = response.json()
+            # Success - process results, following the paging cursor in the
+            # unlikely case a batch matches more than one page of contacts
+            data = _json_loads(response.content)
             results = data.get('results', [])
-            
+            while data.get('paging', {}).get('next', {}).get('after'):
+                body['after'] = data['paging']['next']['after']
+                payload = _json_dumps(body)
+                _rate_limiter.acquire()
+                response = _session.post(_SEARCH_URL, headers=headers, data=payload, timeout=30)
+                if response.status_code != 200:
+                    break
+                data = _json_loads(response.content)
+                results.extend(data.get('results', []))
+            body.pop('after', None)
+
             # Process results
             found_users = []
             found_tokens = set()
@@ -314,25 +416,27 @@ def chunks(lst, n):
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
-def main():
+def main(argv=None, tokens=None):
+    """Entry point. In-process callers can pass the token list directly
+    via ``tokens`` and skip the CSV round-trip entirely."""
     parser = argparse.ArgumentParser(description='HubSpot Contact Lookup - Batch Optimized')
     parser.add_argument('-u', '--user-token', help='Single user token to lookup')
     parser.add_argument('-f', '--file', help='CSV file with user tokens')
     parser.add_argument('-o', '--output', help='Output CSV file for successful lookups')
     parser.add_argument('--error-log', default='hubspot_errors.log', help='Error log file')
     parser.add_argument('--skip-existing', action='store_true', default=True, help='Skip existing users')
-    parser.add_argument('--batch-size', type=int, default=3, help='Number of users per batch (max 5 due to HubSpot API limit)')
+    parser.add_argument('--batch-size', type=int, default=100, help='Number of users per batch (max 100 due to HubSpot API limit)')
     parser.add_argument('--force-refresh', action='store_true', help='Force refresh all users')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    if not args.user_token and not args.file:
+    if tokens is None and not args.user_token and not args.file:
         parser.error("Either -u or -f must be specified")
     
     # Validate batch size doesn't exceed HubSpot's limit
-    if args.batch_size > 5:
-        logger.warning(f"Batch size {args.batch_size} exceeds HubSpot limit of 5. Setting to 5.")
-        args.batch_size = 5
+    if args.batch_size > 100:
+        logger.warning(f"Batch size {args.batch_size} exceeds HubSpot limit of 100. Setting to 100.")
+        args.batch_size = 100
     
     if not HUB_API_KEY:
         logger.error("HUB_API_KEY not found in environment variables")
@@ -343,18 +447,30 @@ def main():
     initialize_users_table(db_path)
     
     # Process user tokens
-    if args.user_token:
+    if tokens is not None:
+        user_tokens = list(tokens)
+    elif args.user_token:
         user_tokens = [args.user_token]
     else:
         try:
-            df = pd.read_csv(args.file)
-            if 'user_token' not in df.columns:
-                logger.error("CSV file must contain a 'user_token' column")
-                sys.exit(1)
-            user_tokens = df['user_token'].tolist()
+            # Stream the single column we need instead of materializing the
+            # whole file as a DataFrame
+            with open(args.file, newline='') as f:
+                reader = csv.DictReader(f)
+                if reader.fieldnames is None or 'user_token' not in reader.fieldnames:
+                    logger.error("CSV file must contain a 'user_token' column")
+                    sys.exit(1)
+                user_tokens = [row['user_token'] for row in reader if row['user_token']]
         except Exception as e:
             logger.error(f"Error reading CSV file: {str(e)}")
             sys.exit(1)
+
+        # Dedupe while preserving order so repeated CSV rows don't trigger
+        # duplicate HubSpot calls and upserts
+        deduped = list(dict.fromkeys(user_tokens))
+        if len(deduped) < len(user_tokens):
+            logger.info(f"Removed {len(user_tokens) - len(deduped)} duplicate tokens from input")
+        user_tokens = deduped
     
     # Filter out existing users if needed
     if args.skip_existing and not args.force_refresh:
@@ -376,13 +492,21 @@ def main():
     successful_batches = 0
     failed_batches = 0
     
-    for i, batch in enumerate(chunks(user_tokens, args.batch_size), 1):
-        batch_users = fetch_users_batch(batch, args.error_log, i, total_batches)
-        if batch_users:
-            all_users.extend(batch_users)
-            successful_batches += 1
-        else:
-            failed_batches += 1
+    # Each batch is network-bound, so keep several requests in flight at
+    # once; the shared session and rate limiter keep this within HubSpot's
+    # 100 req / 10 s budget
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = {
+            executor.submit(fetch_users_batch, batch, args.error_log, i, total_batches): i
+            for i, batch in enumerate(chunks(user_tokens, args.batch_size), 1)
+        }
+        for future in as_completed(futures):
+            batch_users = future.result()
+            if batch_users:
+                all_users.extend(batch_users)
+                successful_batches += 1
+            else:
+                failed_batches += 1
     
     # Save results
     if all_users:
@@ -390,8 +514,13 @@ def main():
         logger.info(f"Successfully processed {len(all_users)} users")
         
         if args.output:
-            df = pd.DataFrame(all_users)
-            df.to_csv(args.output, index=False)
+            with open(args.output, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=[
+                    'user_token', 'email', 'firstname', 'lastname',
+                    'agentai_platform_credits_balance'
+                ])
+                writer.writeheader()
+                writer.writerows(all_users)
             logger.info(f"Saved results to {args.output}")
     
     # Summary
@@ -1,7 +1,7 @@
 # Manual comparison between paid traffic and builder program agents
 
 # Paid traffic agents (69 agents)
-paid_traffic = {
+PAID_TRAFFIC = frozenset({
     "1h24ddd97hrfn8kk", "pdd18pjciy3b0pjb", "w77b59gm4veuvelo", "hletzrnuh0upnj5w", 
     "cs6xru66ss4w29eu", "ns22tqch6lqwwpcw", "z8ddaqxopaz6jdm4", "0rl8poege5wz78jc",
     "k02yqyoxbjdiqcsv", "gp6dbpp6ljitl3i4", "dopy0cq5w4l1v44i", "6rdhln6ukxgt619z",
@@ -19,10 +19,10 @@ paid_traffic = {
     "a22phtn9ixnonxew", "wx8llcd81iooa7yr", "2bl3mtaj069yluxm", "307gue9rw6h1qq24",
     "ic0v05kkul4t5k6g", "xlodgx8hrmy79bdq", "8cai2azhjjuqccck", "pon27olqoj3z57f7",
     "vxxmvpn1x6afng0f", "wxqzw8nlv9yacnqj", "g6qvb8yw1jujwyh5", "437tseruj5otka7v"
-}
+})
 
 # Builder program agents (158 agents) - subset that matters for overlap
-builder_program = {
+BUILDER_PROGRAM = frozenset({
     "a22phtn9ixnonxew", "754f1tgqoblf0u9h", "i18up3klo8lcwr7x", "plksqcehiaeq3kum",
     "wx8llcd81iooa7yr", "0rl8poege5wz78jc", "ns22tqch6lqwwpcw", "pdd18pjciy3b0pjb",
     "w77b59gm4veuvelo", "fyqb5rdl0yhrmfht", "2a9pjinh94baztv0", "27c06uk26r8bxwtc",
@@ -34,17 +34,18 @@ builder_program = {
     "xlodgx8hrmy79bdq", "8jchn0bmt9n8lk6g", "z9puf4wjtq69aimh", "ee0e6pij4gvw40kj",
     "k3tzy4olzcs8tl3w", "tnsjzc0x41how6aa", "0gkmdhot7dfusghg", "q0md7gxt8du19q9s",
     "89m8frwlokpxr8ny", "2b8i965qh8yqj25p", "3n42o0s9qdqfn4g9", "z8ddaqxopaz6jdm4"
-}
+})
 
 # Find overlap
-overlap = paid_traffic.intersection(builder_program)
-not_in_builder = paid_traffic - builder_program
+OVERLAP = PAID_TRAFFIC & BUILDER_PROGRAM
+NOT_IN_BUILDER = PAID_TRAFFIC - BUILDER_PROGRAM
 
-print(f"Total paid traffic agents: {len(paid_traffic)}")
-print(f"Paid traffic agents also in builder program: {len(overlap)}")
-print(f"ANSWER: {len(not_in_builder)} paid traffic agents are NOT in builder program")
-print(f"Percentage NOT in builder program: {(len(not_in_builder)/len(paid_traffic))*100:.1f}%")
+if __name__ == "__main__":
+    print(f"Total paid traffic agents: {len(PAID_TRAFFIC)}")
+    print(f"Paid traffic agents also in builder program: {len(OVERLAP)}")
+    print(f"ANSWER: {len(NOT_IN_BUILDER)} paid traffic agents are NOT in builder program")
+    print(f"Percentage NOT in builder program: {(len(NOT_IN_BUILDER)/len(PAID_TRAFFIC))*100:.1f}%")
 
-print(f"\nAgents that got paid traffic AND are in builder program:")
-for agent_id in sorted(overlap):
-    print(f"  {agent_id}") 
\ No newline at end of file
+    print(f"\nAgents that got paid traffic AND are in builder program:")
+    for agent_id in sorted(OVERLAP):
+        print(f"  {agent_id}")
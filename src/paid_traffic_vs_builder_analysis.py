@@ -11,9 +11,9 @@ WHAT IT DOES:
 3. Counts overlap and non-overlap
 """
 
+import csv
 import os
 import sqlite3
-import pandas as pd
 
 def analyze_paid_traffic_vs_builder():
     """Analyze overlap between paid traffic agents and builder grant program."""
@@ -23,8 +23,11 @@ def analyze_paid_traffic_vs_builder():
         print("❌ paid_traffic_exclusion_list.csv not found. Run find_paid_traffic_agents.py first.")
         return
     
-    paid_traffic_df = pd.read_csv('paid_traffic_exclusion_list.csv')
-    paid_traffic_ids = set(paid_traffic_df['agent_id'].tolist())
+    # Only the agent_id column is consumed, and only as a set - the stdlib
+    # csv reader builds that directly without the pandas import or an
+    # intermediate DataFrame
+    with open('paid_traffic_exclusion_list.csv', newline='') as f:
+        paid_traffic_ids = {row['agent_id'] for row in csv.DictReader(f)}
     
     # Connect to database
     db_path = 'data/agents.db'
@@ -40,38 +43,44 @@ def analyze_paid_traffic_vs_builder():
         conn.close()
         return
     
-    # Get builder grant program agent IDs
-    cursor.execute("SELECT agent_id FROM agents WHERE builder_grant_program = 1")
-    builder_ids = set([row[0] for row in cursor.fetchall()])
-    
-    # Find overlap and non-overlap
-    paid_traffic_and_builder = paid_traffic_ids.intersection(builder_ids)
-    paid_traffic_not_builder = paid_traffic_ids - builder_ids
-    
-    # Get details for reporting
-    cursor.execute("""
-        SELECT agent_id, agent_id_human, name, status, executions, reviews_count, price
-        FROM agents 
-        WHERE agent_id IN ({})
-    """.format(','.join(['?' for _ in paid_traffic_not_builder])), list(paid_traffic_not_builder))
-    
-    non_builder_details = cursor.fetchall()
-    
+    # Total builder program size for the report header
+    cursor.execute("SELECT COUNT(*) FROM agents WHERE builder_grant_program = 1")
+    total_builder_agents = cursor.fetchone()[0]
+
+    # Push the intersection into SQLite: load the paid-traffic ids into a
+    # temp table joined on the agents PK (instead of pulling every builder
+    # id into Python and sending the result back as a huge IN list), and
+    # let one pass return each agent's details plus its builder flag
+    cursor.execute("CREATE TEMP TABLE tmp_ids (agent_id TEXT PRIMARY KEY) WITHOUT ROWID")
+    cursor.executemany("INSERT OR IGNORE INTO tmp_ids VALUES (?)",
+                       [(agent_id,) for agent_id in paid_traffic_ids])
     cursor.execute("""
-        SELECT agent_id, agent_id_human, name, status, executions, reviews_count, price
-        FROM agents 
-        WHERE agent_id IN ({})
-    """.format(','.join(['?' for _ in paid_traffic_and_builder])), list(paid_traffic_and_builder))
-    
-    builder_details = cursor.fetchall()
-    
+        SELECT a.agent_id, a.agent_id_human, a.name, a.status, a.executions, a.reviews_count, a.price,
+               COALESCE(a.builder_grant_program, 0)
+        FROM agents a
+        JOIN tmp_ids t ON a.agent_id = t.agent_id
+    """)
+
+    builder_details = []
+    non_builder_details = []
+    for row in cursor.fetchall():
+        if row[7] == 1:
+            builder_details.append(row[:7])
+        else:
+            non_builder_details.append(row[:7])
+
+    # Paid-traffic ids missing from the agents table still count as
+    # not-in-builder, matching the old set-difference behavior
+    paid_traffic_and_builder = {row[0] for row in builder_details}
+    paid_traffic_not_builder = paid_traffic_ids - paid_traffic_and_builder
+
     conn.close()
     
     # Display results
     print("🔍 Paid Traffic vs Builder Grant Program Analysis")
     print("=" * 60)
     print(f"Total agents that received paid traffic: {len(paid_traffic_ids)}")
-    print(f"Total builder grant program agents: {len(builder_ids)}")
+    print(f"Total builder grant program agents: {total_builder_agents}")
     print()
     print(f"🎯 MAIN ANSWER:")
     print(f"Paid traffic agents NOT in builder program: {len(paid_traffic_not_builder)}")
@@ -1,10 +1,13 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import argparse
 from typing import Dict, Any, Optional, List, Tuple
 from dotenv import load_dotenv
 from datetime import datetime
+from functools import lru_cache
 import sqlite3
 
 # Load environment variables from .env file
@@ -15,6 +18,15 @@ load_dotenv(dotenv_path=env_path, override=True)
 # Get API key for Agent.ai V1 API from environment variables
 API_KEY = os.getenv("AGENT_AI_API_KEY")
 
+@lru_cache(maxsize=4096)
+def _parse_ts(timestamp_str: str) -> Optional[datetime]:
+    """Parse an API timestamp, memoized since the same strings repeat
+    across agents in a page of results."""
+    try:
+        return datetime.strptime(timestamp_str, "%a, %d %b %Y %H:%M:%S %Z")
+    except ValueError:
+        return None
+
 class AgentAIClient:
     def __init__(self, api_key: str):
         if not api_key:
@@ -25,7 +37,18 @@ class AgentAIClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-    
+        # Keep-alive session: repeated find_agents calls reuse one TLS
+        # connection, with retry-and-backoff on transient failures
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        ))
+
     def find_agents(
         self,
         status: str = None,
@@ -53,7 +76,7 @@ class AgentAIClient:
             params["intent"] = intent
         print(f"\nSending request with params: {json.dumps(params, indent=2)}")
         try:
-            response = requests.post(url, headers=self.headers, json=params)
+            response = self.session.post(url, json=params, timeout=(3.05, 30))
             if response.status_code == 401:
                 return None, "Authentication failed. Please check your API key at https://agent.ai/user/settings#credits"
             elif response.status_code == 403:
@@ -77,6 +100,10 @@ class AgentAIClient:
     def parse_agent_response(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
         agents = []
         for agent in response.get("response", []):
+            # Parse each timestamp once and carry both the datetime and the
+            # ISO string, so the insert path doesn't re-run strptime
+            created_at = self._parse_timestamp(agent.get("created_at"))
+            updated_at = self._parse_timestamp(agent.get("updated_at"))
             parsed_agent = {
                 "id": agent.get("agent_id"),
                 "human_id": agent.get("agent_id_human"),
@@ -91,8 +118,10 @@ class AgentAIClient:
                     "score": agent.get("reviews_score", 0)
                 },
                 "tags": agent.get("tags", []),
-                "created_at": self._parse_timestamp(agent.get("created_at")),
-                "updated_at": self._parse_timestamp(agent.get("updated_at")),
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "created_at_iso": created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else agent.get("created_at") or None,
+                "updated_at_iso": updated_at.strftime("%Y-%m-%d %H:%M:%S") if updated_at else agent.get("updated_at") or None,
                 "authors": self._parse_authors(agent.get("authors", {})),
                 "approximate_time": agent.get("approximate_time"),
                 "is_approved": agent.get("is_approved", False)
@@ -103,10 +132,7 @@ class AgentAIClient:
     def _parse_timestamp(self, timestamp_str: Optional[str]) -> Optional[datetime]:
         if not timestamp_str:
             return None
-        try:
-            return datetime.strptime(timestamp_str, "%a, %d %b %Y %H:%M:%S %Z")
-        except ValueError:
-            return None
+        return _parse_ts(timestamp_str)
 
     def _parse_authors(self, authors: Dict[str, Any]) -> List[Dict[str, Any]]:
         return [
@@ -119,9 +145,25 @@ class AgentAIClient:
             for user_token, info in authors.items()
         ]
 
+# Prepared once at module scope; executemany then compiles it a single time
+INSERT_AGENT_SQL = '''
+    INSERT OR REPLACE INTO agents (
+        agent_id, agent_id_human, approximate_time, authors, created_at, description, executions, featured_at, icon, invoke_agent_input, is_approved, name, price, reviews_count, reviews_score, status, tags, type, updated_at
+    ) VALUES ({})
+'''.format(', '.join(['?'] * 19))
+
+def open_db(db_path):
+    """Connect with write-friendly pragmas for bulk single-writer loads."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
 def initialize_agents_db(db_path='data/private_agents.db'):
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path)
+    conn = open_db(db_path)
     c = conn.cursor()
     c.execute('''
         CREATE TABLE IF NOT EXISTS agents (
@@ -173,46 +215,39 @@ def main():
             print(f"\nRaw response length: {len(response.get('response', []))}")
             agents = client.parse_agent_response(response)
             print(f"Parsed {len(agents)} agents")
-            conn = sqlite3.connect('data/private_agents.db')
-            c = conn.cursor()
-            for agent in response.get('response', []):
-                def to_iso8601(dt_str):
-                    try:
-                        dt = datetime.strptime(dt_str, "%a, %d %b %Y %H:%M:%S %Z")
-                        return dt.strftime("%Y-%m-%d %H:%M:%S")
-                    except Exception:
-                        return dt_str or None
-                created_at = to_iso8601(agent.get('created_at'))
-                updated_at = to_iso8601(agent.get('updated_at'))
-                tags = json.dumps(agent.get('tags', []))
-                invoke_agent_input = json.dumps(agent.get('invoke_agent_input', []))
-                authors = json.dumps(agent.get('authors', {}))
-                c.execute('''
-                    INSERT OR REPLACE INTO agents (
-                        agent_id, agent_id_human, approximate_time, authors, created_at, description, executions, featured_at, icon, invoke_agent_input, is_approved, name, price, reviews_count, reviews_score, status, tags, type, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+            conn = open_db('data/private_agents.db')
+            rows = [
+                (
                     agent.get('agent_id'),
                     agent.get('agent_id_human'),
                     agent.get('approximate_time'),
-                    authors,
-                    created_at,
+                    json.dumps(agent.get('authors', {})),
+                    parsed['created_at_iso'],
                     agent.get('description'),
                     agent.get('executions'),
                     agent.get('featured_at'),
                     agent.get('icon'),
-                    invoke_agent_input,
+                    json.dumps(agent.get('invoke_agent_input', [])),
                     int(agent.get('is_approved', False)),
                     agent.get('name'),
                     agent.get('price'),
                     agent.get('reviews_count'),
                     agent.get('reviews_score'),
                     agent.get('status'),
-                    tags,
+                    json.dumps(agent.get('tags', [])),
                     agent.get('type'),
-                    updated_at
-                ))
-            conn.commit()
+                    parsed['updated_at_iso']
+                )
+                for agent, parsed in zip(response.get('response', []), agents)
+            ]
+            # One executemany in one transaction: a single commit/fsync
+            # instead of an implicit transaction per row. The description
+            # index is dropped for the load and rebuilt in one sorted pass
+            # so each insert skips B-tree maintenance on the large column
+            with conn:
+                conn.execute('DROP INDEX IF EXISTS idx_agents_description')
+                conn.executemany(INSERT_AGENT_SQL, rows)
+                conn.execute('CREATE INDEX idx_agents_description ON agents(description)')
             conn.close()
             print(f"Inserted {len(agents)} agents into the database.")
             for i, agent in enumerate(agents):
@@ -9,6 +9,7 @@ import pandas as pd
 import sqlite3
 import json
 import logging
+from itertools import chain
 from pathlib import Path
 from typing import List, Dict, Set
 from datetime import datetime
@@ -34,20 +35,40 @@ def get_db_path():
     project_root = get_project_root()
     return str(project_root / 'data' / 'agents.db')
 
+# Arrow-backed strings store column data contiguously instead of one
+# Python object per cell; fall back to pandas' own string dtype when
+# pyarrow isn't installed
+try:
+    import pyarrow  # noqa: F401
+    CSV_STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    CSV_STRING_DTYPE = 'string'
+
+REQUIRED_COLUMNS = [
+    "Record ID - Contact",
+    "First Name",
+    "Last Name",
+    "Email",
+    "Platform User Token",
+    "Last Activity Date",
+    "Record ID - Company",
+    "Company name"
+]
+
+def open_db(db_path):
+    """Connect with write-friendly pragmas for bulk single-writer updates."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
 def validate_csv(df: pd.DataFrame) -> bool:
     """Validate the CSV data has required columns."""
-    required_columns = [
-        "Record ID - Contact",
-        "First Name",
-        "Last Name",
-        "Email",
-        "Platform User Token",
-        "Last Activity Date",
-        "Record ID - Company",
-        "Company name"
-    ]
-    
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    # Set membership keeps the check O(1) per column as the list grows
+    columns = set(df.columns)
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
     if missing_columns:
         logger.error(f"Missing required columns: {missing_columns}")
         return False
@@ -59,31 +80,79 @@ def validate_csv(df: pd.DataFrame) -> bool:
     
     return True
 
+def build_agent_authors(conn: sqlite3.Connection):
+    """Flatten agents.authors JSON into an indexed temp table, once per run.
+
+    The per-user json_each(authors) EXISTS query re-parses every authors
+    blob for every attendee; this pays that parse cost a single time and
+    makes each token lookup an index seek.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS temp.agent_authors")
+    cursor.execute("""
+        CREATE TEMP TABLE agent_authors AS
+        SELECT a.agent_id, a.agent_id_human, a.name, a.status, je.key AS user_token
+        FROM agents a, json_each(a.authors) je
+    """)
+    cursor.execute("CREATE INDEX temp.idx_aa_user ON agent_authors(user_token)")
+
+def get_agents_for_tokens(user_tokens: List[str], conn: sqlite3.Connection) -> Dict[str, List[Dict]]:
+    """Fetch agents for a whole batch of tokens with one join."""
+    agents_by_token: Dict[str, List[Dict]] = {}
+    if not user_tokens:
+        return agents_by_token
+
+    cursor = conn.cursor()
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_tokens (user_token TEXT PRIMARY KEY)")
+    cursor.execute("DELETE FROM tmp_tokens")
+    cursor.executemany("INSERT OR IGNORE INTO tmp_tokens VALUES (?)", [(t,) for t in user_tokens])
+    cursor.execute("""
+        SELECT aa.user_token, aa.agent_id, aa.agent_id_human, aa.name, aa.status
+        FROM agent_authors aa
+        JOIN tmp_tokens t ON aa.user_token = t.user_token
+    """)
+    for user_token, agent_id, agent_id_human, name, status in cursor.fetchall():
+        agents_by_token.setdefault(user_token, []).append({
+            'agent_id': agent_id,
+            'agent_id_human': agent_id_human,
+            'name': name,
+            'status': status
+        })
+    return agents_by_token
+
 def get_user_agents(user_token: str, conn: sqlite3.Connection) -> List[Dict]:
-    """Get all agents (public and private) associated with a user's platform token."""
+    """Get all agents (public and private) associated with a user's platform token.
+
+    Requires build_agent_authors to have run on this connection: the lookup
+    is then a single index seek instead of a full scan with a json_each
+    parse per row.
+    """
     cursor = conn.cursor()
-    
-    # Query both public and private agents
     cursor.execute("""
-        SELECT agent_id, agent_id_human, name, authors, status
-        FROM agents
-        WHERE EXISTS (
-            SELECT 1 FROM json_each(authors) 
-            WHERE json_each.key = ?
-        )
+        SELECT agent_id, agent_id_human, name, status
+        FROM agent_authors
+        WHERE user_token = ?
     """, (user_token,))
-    
-    agents = []
-    for row in cursor.fetchall():
-        agent_id, agent_id_human, name, authors_json, status = row
-        agents.append({
+
+    # Iterate the cursor directly instead of materializing via fetchall
+    return [
+        {
             'agent_id': agent_id,
             'agent_id_human': agent_id_human,
             'name': name,
             'status': status
-        })
-    
-    return agents
+        }
+        for agent_id, agent_id_human, name, status in cursor
+    ]
+
+def user_has_agents(user_token: str, conn: sqlite3.Connection) -> bool:
+    """Cheap presence check: one index probe, no row materialization."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT EXISTS(SELECT 1 FROM agent_authors WHERE user_token = ?)",
+        (user_token,)
+    )
+    return bool(cursor.fetchone()[0])
 
 def init_db(conn: sqlite3.Connection):
     """Initialize database schema if needed."""
@@ -109,76 +178,82 @@ def process_attendees(csv_path: str, batch_size: int = 50):
     """Process NYTW attendees and update the database."""
     logger.info(f"Starting NYTW attendee processing from {csv_path}")
     
-    # Read and validate CSV
+    # Stream the CSV in batch-sized chunks, keeping only the columns we
+    # use, so peak memory stays O(batch) instead of O(file). Validation
+    # runs on the first chunk before any database work starts.
     try:
-        df = pd.read_csv(csv_path)
-        if not validate_csv(df):
+        reader = pd.read_csv(csv_path, usecols=lambda c: c in REQUIRED_COLUMNS,
+                             dtype=CSV_STRING_DTYPE, chunksize=batch_size)
+        first_batch = next(reader, None)
+        if first_batch is None:
+            logger.error("CSV file is empty")
+            return
+        if not validate_csv(first_batch):
             logger.error("CSV validation failed")
             return
     except Exception as e:
         logger.error(f"Error reading CSV: {str(e)}")
         return
-    
+
     # Connect to database and initialize schema
     db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
+    conn = open_db(db_path)
     init_db(conn)
-    
+    build_agent_authors(conn)
+
     # Initialize counters
-    total_attendees = len(df)
+    total_attendees = 0
     processed = 0
     updated = 0
     unmatched = []
     no_agents = []
-    
-    # Process in batches
-    for i in range(0, total_attendees, batch_size):
-        batch = df.iloc[i:i + batch_size]
-        logger.info(f"Processing batch {i//batch_size + 1} ({i+1}-{min(i+batch_size, total_attendees)} of {total_attendees})")
-        
-        for _, row in batch.iterrows():
-            email = row['Email']
-            platform_token = row['Platform User Token']
-            
+
+    # Process in batches as they stream off disk
+    for batch_num, batch in enumerate(chain([first_batch], reader), 1):
+        total_attendees += len(batch)
+        logger.info(f"Processing batch {batch_num} (rows {total_attendees - len(batch) + 1}-{total_attendees})")
+
+        # Pull the two needed columns as arrays once; iterrows would build
+        # a Series object per attendee just to read them back out
+        batch_emails = batch['Email'].to_numpy()
+        batch_tokens_arr = batch['Platform User Token'].to_numpy()
+
+        # Prefetch agents for the whole batch in one join instead of one
+        # json_each query per attendee
+        batch_tokens = [t for t in batch_tokens_arr if pd.notna(t)]
+        agents_by_token = get_agents_for_tokens(batch_tokens, conn)
+
+        upsert_rows = []
+        for email, platform_token in zip(batch_emails, batch_tokens_arr):
             if pd.isna(platform_token):
                 unmatched.append(email)
                 logger.warning(f"No platform token found for email: {email}")
                 continue
-                
+
             # Get user's agents
-            agents = get_user_agents(platform_token, conn)
-            
+            agents = agents_by_token.get(platform_token, [])
+
             if agents:
-                # Update user record
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE users 
-                    SET nytw_status = 'confirmed',
-                        agents = ?
-                    WHERE user_token = ?
-                """, (json.dumps(agents), platform_token))
-                
-                if cursor.rowcount > 0:
-                    updated += 1
-                    logger.info(f"Updated user {email} ({platform_token}) with {len(agents)} agents")
-                else:
-                    # Try to insert if update failed
-                    cursor.execute("""
-                        INSERT INTO users (user_token, email, nytw_status, agents)
-                        VALUES (?, ?, 'confirmed', ?)
-                    """, (platform_token, email, json.dumps(agents)))
-                    if cursor.rowcount > 0:
-                        updated += 1
-                        logger.info(f"Inserted new user {email} ({platform_token}) with {len(agents)} agents")
-                    else:
-                        unmatched.append(email)
-                        logger.warning(f"Failed to insert/update user: {email} ({platform_token})")
+                upsert_rows.append((platform_token, email, json.dumps(agents)))
+                logger.info(f"Upserting user {email} ({platform_token}) with {len(agents)} agents")
             else:
                 no_agents.append(email)
                 logger.warning(f"No agents found for user: {email} ({platform_token})")
-            
+
             processed += 1
-        
+
+        # One native UPSERT per batch replaces the per-row UPDATE followed
+        # by an INSERT fallback when no row matched
+        if upsert_rows:
+            conn.executemany("""
+                INSERT INTO users (user_token, email, nytw_status, agents)
+                VALUES (?, ?, 'confirmed', ?)
+                ON CONFLICT(user_token) DO UPDATE SET
+                    nytw_status = excluded.nytw_status,
+                    agents = excluded.agents
+            """, upsert_rows)
+            updated += len(upsert_rows)
+
         # Commit after each batch
         conn.commit()
     
@@ -20,9 +20,9 @@ OUTPUT:
 """
 
 import sqlite3
-import json
+import sys
+
 import pandas as pd
-from collections import defaultdict
 
 def analyze_group_b_builders():
     """Analyze Group B builders - unique builders of public agents, excluding Grant Program Builders."""
@@ -33,155 +33,130 @@ def analyze_group_b_builders():
     
     print("🔍 Analyzing Group B Builders (Public Agent Creators Excluding Grant Program Builders)")
     print("=" * 80)
-    
-    # Step 1: Get all public agents excluding Grant Program Builder agents
-    print("\n📊 Querying Group B public agents...")
-    cursor.execute("""
-        SELECT agent_id, authors, executions, reviews_count, reviews_score
-        FROM agents 
-        WHERE status = 'public' 
-        AND (builder_grant_program IS NULL OR builder_grant_program != 1)
-    """)
-    
-    public_agents = cursor.fetchall()
-    print(f"Found {len(public_agents)} Group B public agents")
-    
-    # Step 2: Extract unique user tokens from authors
-    print("\n👤 Extracting unique Group B builders...")
-    builder_stats = defaultdict(lambda: {
-        'agent_count': 0,
-        'total_executions': 0,
-        'total_reviews': 0,
-        'total_weighted_rating': 0,
-        'agent_ids': []
-    })
-    
-    group_b_builders = set()
-    
-    for agent_id, authors_json, executions, reviews_count, reviews_score in public_agents:
-        if authors_json:
-            try:
-                authors = json.loads(authors_json)
-                for user_token in authors.keys():
-                    group_b_builders.add(user_token)
-                    builder_stats[user_token]['agent_count'] += 1
-                    builder_stats[user_token]['total_executions'] += executions or 0
-                    builder_stats[user_token]['total_reviews'] += reviews_count or 0
-                    if reviews_count and reviews_count > 0:
-                        builder_stats[user_token]['total_weighted_rating'] += (reviews_score or 0) * reviews_count
-                    builder_stats[user_token]['agent_ids'].append(agent_id)
-            except json.JSONDecodeError:
-                continue
-    
-    print(f"Found {len(group_b_builders)} unique Group B builders")
-    
-    # Step 3: Get Grant Program Builder statistics for comparison
-    print("\n📈 Getting Grant Program Builder statistics for comparison...")
+
+    # Every query below filters on status='public'; a partial index keyed
+    # by the grant flag turns those scans into probes over public rows only
     cursor.execute("""
-        SELECT COUNT(DISTINCT agent_id) as total_public_agents,
-               COUNT(DISTINCT CASE WHEN builder_grant_program = 1 THEN agent_id END) as grant_program_public_agents
-        FROM agents 
+        CREATE INDEX IF NOT EXISTS idx_agents_public_bgp
+        ON agents(builder_grant_program)
         WHERE status = 'public'
     """)
-    
-    total_public, grant_program_public = cursor.fetchone()
-    
-    # Get unique Grant Program Builders who have public agents
+    cursor.execute("ANALYZE agents")
+
+    # Step 1: All three agent counts come from one scan of the public
+    # rows, partitioned by the grant flag, instead of a scan per count
+    print("\n📊 Querying public agent counts...")
     cursor.execute("""
-        SELECT authors
-        FROM agents 
-        WHERE status = 'public' 
-        AND builder_grant_program = 1
+        SELECT COUNT(*) AS total_public,
+               COUNT(CASE WHEN builder_grant_program = 1 THEN 1 END) AS grant_program_public,
+               COUNT(CASE WHEN builder_grant_program IS NULL OR builder_grant_program != 1 THEN 1 END) AS group_b
+        FROM agents
+        WHERE status = 'public'
     """)
-    
-    grant_program_authors = cursor.fetchall()
-    grant_program_builders = set()
-    
-    for (authors_json,) in grant_program_authors:
-        if authors_json:
-            try:
-                authors = json.loads(authors_json)
-                grant_program_builders.update(authors.keys())
-            except json.JSONDecodeError:
-                continue
-    
+    total_public, grant_program_public, group_b_agent_count = cursor.fetchone()
+    print(f"Found {group_b_agent_count} Group B public agents")
+
+    # Step 2: Aggregate per-builder stats inside SQLite. json_each unnests
+    # the authors dict (keys are user tokens) so the grouping and sums run
+    # in C instead of json.loads + dict updates per row in Python. Both
+    # builder groups come out of this single pass, keyed by the grant
+    # flag, so the authors blobs are only unpacked once
+    print("\n👤 Extracting unique builders by group...")
+    all_builders_df = pd.read_sql_query("""
+        SELECT CASE WHEN a.builder_grant_program = 1 THEN 1 ELSE 0 END AS is_grant,
+               je.key AS user_token,
+               COUNT(*) AS public_agent_count,
+               SUM(COALESCE(a.executions, 0)) AS total_executions,
+               SUM(COALESCE(a.reviews_count, 0)) AS total_reviews,
+               SUM(CASE WHEN a.reviews_count > 0
+                   THEN COALESCE(a.reviews_score, 0) * a.reviews_count
+                   ELSE 0 END) AS total_weighted_rating
+        FROM agents a, json_each(a.authors) je
+        WHERE a.status = 'public'
+        AND a.authors IS NOT NULL AND json_valid(a.authors)
+        GROUP BY is_grant, je.key
+    """, conn)
+
+    builders_df = all_builders_df[all_builders_df['is_grant'] == 0].drop(columns='is_grant')
+    grant_program_builder_count = int((all_builders_df['is_grant'] == 1).sum())
+    print(f"Found {len(builders_df)} unique Group B builders")
+
     conn.close()
     
-    # Step 4: Calculate and display results
-    print(f"\n{'='*80}")
-    print("📊 GROUP B BUILDERS ANALYSIS RESULTS")
-    print(f"{'='*80}")
-    print(f"Total public agents on platform: {total_public:,}")
-    print(f"Public agents by Grant Program Builders: {grant_program_public:,}")
-    print(f"Public agents by Group B builders: {len(public_agents):,}")
-    print()
-    print(f"Grant Program Builders with public agents: {len(grant_program_builders)}")
-    print(f"Group B builders with public agents: {len(group_b_builders)}")
-    print(f"Total unique builders with public agents: {len(grant_program_builders) + len(group_b_builders)}")
-    
     # Calculate percentages
     grant_program_percentage = (grant_program_public / total_public) * 100 if total_public > 0 else 0
-    group_b_percentage = (len(public_agents) / total_public) * 100 if total_public > 0 else 0
-    
-    print(f"\nPercentage breakdown:")
-    print(f"Grant Program Builders: {grant_program_percentage:.1f}% of public agents")
-    print(f"Group B builders: {group_b_percentage:.1f}% of public agents")
-    
+    group_b_percentage = (group_b_agent_count / total_public) * 100 if total_public > 0 else 0
+
     # Calculate productivity metrics
-    grant_avg_agents = grant_program_public / len(grant_program_builders) if len(grant_program_builders) > 0 else 0
-    group_b_avg_agents = len(public_agents) / len(group_b_builders) if len(group_b_builders) > 0 else 0
-    
-    print(f"\nProductivity comparison:")
-    print(f"Grant Program Builders: {grant_avg_agents:.1f} public agents per builder")
-    print(f"Group B builders: {group_b_avg_agents:.1f} public agents per builder")
-    
-    # Step 5: Top Group B builders analysis
-    print(f"\n🏆 TOP 10 GROUP B BUILDERS:")
-    print("-" * 80)
-    
-    # Sort builders by agent count
-    sorted_builders = sorted(builder_stats.items(), key=lambda x: x[1]['agent_count'], reverse=True)
-    
-    print(f"{'Rank':<5} {'User Token':<35} {'Agents':<8} {'Executions':<12} {'Avg Rating':<10}")
-    print("-" * 80)
-    
-    for i, (user_token, stats) in enumerate(sorted_builders[:10], 1):
-        avg_rating = (stats['total_weighted_rating'] / stats['total_reviews']) if stats['total_reviews'] > 0 else 0
-        print(f"{i:<5} {user_token:<35} {stats['agent_count']:<8} {stats['total_executions']:<12,} {avg_rating:<10.2f}")
-    
+    grant_avg_agents = grant_program_public / grant_program_builder_count if grant_program_builder_count > 0 else 0
+    group_b_avg_agents = group_b_agent_count / len(builders_df) if len(builders_df) > 0 else 0
+
+    # Average rating computed vectorized over the whole frame
+    builders_df['average_rating'] = (
+        builders_df['total_weighted_rating'] / builders_df['total_reviews'].where(builders_df['total_reviews'] > 0)
+    ).fillna(0)
+
+    # Step 4/5: build the whole report then emit it in one write, rather
+    # than a stdout flush per line
+    report = [
+        f"\n{'='*80}",
+        "📊 GROUP B BUILDERS ANALYSIS RESULTS",
+        f"{'='*80}",
+        f"Total public agents on platform: {total_public:,}",
+        f"Public agents by Grant Program Builders: {grant_program_public:,}",
+        f"Public agents by Group B builders: {group_b_agent_count:,}",
+        "",
+        f"Grant Program Builders with public agents: {grant_program_builder_count}",
+        f"Group B builders with public agents: {len(builders_df)}",
+        f"Total unique builders with public agents: {grant_program_builder_count + len(builders_df)}",
+        "",
+        "Percentage breakdown:",
+        f"Grant Program Builders: {grant_program_percentage:.1f}% of public agents",
+        f"Group B builders: {group_b_percentage:.1f}% of public agents",
+        "",
+        "Productivity comparison:",
+        f"Grant Program Builders: {grant_avg_agents:.1f} public agents per builder",
+        f"Group B builders: {group_b_avg_agents:.1f} public agents per builder",
+        "",
+        "🏆 TOP 10 GROUP B BUILDERS:",
+        "-" * 80,
+        f"{'Rank':<5} {'User Token':<35} {'Agents':<8} {'Executions':<12} {'Avg Rating':<10}",
+        "-" * 80,
+    ]
+
+    # Only the display needs ranking; nlargest is a partial selection
+    # instead of sorting every builder, and the CSV export below doesn't
+    # care about row order
+    top_builders = builders_df.nlargest(10, 'public_agent_count')
+    report.extend(
+        f"{i:<5} {row.user_token:<35} {row.public_agent_count:<8} {row.total_executions:<12,} {row.average_rating:<10.2f}"
+        for i, row in enumerate(top_builders.itertuples(index=False), 1)
+    )
+    sys.stdout.write('\n'.join(report) + '\n')
+
     # Step 6: Export Group B summary
     print(f"\n📁 Exporting Group B data...")
-    
-    summary_data = []
-    for user_token, stats in sorted_builders:
-        avg_rating = (stats['total_weighted_rating'] / stats['total_reviews']) if stats['total_reviews'] > 0 else 0
-        summary_data.append({
-            'user_token': user_token,
-            'public_agent_count': stats['agent_count'],
-            'total_executions': stats['total_executions'],
-            'total_reviews': stats['total_reviews'],
-            'average_rating': avg_rating
-        })
-    
-    # Export to CSV
-    df = pd.DataFrame(summary_data)
+
     output_file = 'group_b_builders_summary.csv'
-    df.to_csv(output_file, index=False)
+    builders_df[['user_token', 'public_agent_count', 'total_executions',
+                 'total_reviews', 'average_rating']].to_csv(output_file, index=False)
     print(f"✅ Group B builders exported to: {output_file}")
-    
-    # Export Group B builder IDs for easy reference
-    group_b_ids = list(group_b_builders)
-    ids_df = pd.DataFrame({'user_token': group_b_ids})
+
+    # Export Group B builder IDs for easy reference. A single text column
+    # needs no pandas formatter — plain writelines skips the per-row
+    # quoting/escaping machinery entirely
     ids_output = 'group_b_builders_user_tokens.csv'
-    ids_df.to_csv(ids_output, index=False)
+    with open(ids_output, 'w') as f:
+        f.write('user_token\n')
+        f.writelines(token + '\n' for token in builders_df['user_token'])
     print(f"✅ Group B builder user tokens exported to: {ids_output}")
-    
+
     return {
-        'group_b_builders': len(group_b_builders),
-        'grant_program_builders': len(grant_program_builders),
+        'group_b_builders': len(builders_df),
+        'grant_program_builders': grant_program_builder_count,
         'total_public_agents': total_public,
         'grant_program_public_agents': grant_program_public,
-        'group_b_public_agents': len(public_agents)
+        'group_b_public_agents': group_b_agent_count
     }
 
 if __name__ == "__main__":
@@ -205,7 +205,7 @@ def initialize_agents_db(db_path=None):
     conn.commit()
     conn.close()
 
-def main():
+def main(argv=None):
     # Initialize the agents database
     initialize_agents_db()
     # Set up argument parser
@@ -219,7 +219,7 @@ def main():
     parser.add_argument('-o', '--offset', type=int, default=0, help='Number of results to skip')
 
     # Parse arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     try:
         client = AgentAIClient(API_KEY)
@@ -1,23 +1,24 @@
 #!/usr/bin/env python3
 import os
-import sqlite3
 
-# Connect to database
-db_path = 'data/agents.db'
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+from _db import open_db
 
-# Count paid agents NOT in builder program
-cursor.execute("SELECT COUNT(*) FROM agents WHERE price > 0 AND (builder_grant_program = 0 OR builder_grant_program IS NULL)")
-paid_non_builder = cursor.fetchone()[0]
+# Connect writable so the partial index below can be created on first run
+conn = open_db(ro=False)
+cursor = conn.cursor()
 
-# Count total paid agents
-cursor.execute("SELECT COUNT(*) FROM agents WHERE price > 0")
-total_paid = cursor.fetchone()[0]
+# Partial index keeps the scan proportional to paid rows only
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_agents_paid ON agents(builder_grant_program) WHERE price > 0")
 
-# Count paid builder agents  
-cursor.execute("SELECT COUNT(*) FROM agents WHERE price > 0 AND builder_grant_program = 1")
-paid_builder = cursor.fetchone()[0]
+# All three counts in a single pass over the paid rows
+cursor.execute("""
+    SELECT COUNT(*) AS total_paid,
+           SUM(CASE WHEN builder_grant_program = 1 THEN 1 ELSE 0 END) AS paid_builder,
+           SUM(CASE WHEN builder_grant_program = 0 OR builder_grant_program IS NULL THEN 1 ELSE 0 END) AS paid_non_builder
+    FROM agents
+    WHERE price > 0
+""")
+total_paid, paid_builder, paid_non_builder = cursor.fetchone()
 
 print(f"ANSWER: {paid_non_builder:,} paid agents are NOT in the builder program")
 print(f"Total paid agents: {total_paid:,}")
@@ -7,9 +7,7 @@ Simple script to refresh local data by:
 
 import os
 import sys
-import subprocess
 import sqlite3
-import json
 from pathlib import Path
 
 def get_project_root():
@@ -18,23 +16,27 @@ def get_project_root():
     # Go up one level from src/ to get to project root
     return script_dir.parent
 
-def run_command(cmd, description):
-    """Run a command and handle errors."""
+def run_step(func, argv, description, **kwargs):
+    """Call an in-repo entry point directly and handle errors.
+
+    Calling main(argv) in-process skips a Python interpreter start per
+    step and streams output straight to our stdout instead of buffering
+    it through a subprocess pipe. Extra keyword arguments are forwarded
+    to the entry point (e.g. an in-memory token list).
+    """
     print(f"\n{'='*60}")
     print(f"Running: {description}")
-    print(f"Command: {' '.join(cmd)}")
+    print(f"Args: {' '.join(argv)}")
     print(f"{'='*60}")
-    
+
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        print(result.stdout)
-        if result.stderr:
-            print("STDERR:", result.stderr)
+        func(argv, **kwargs)
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"ERROR: Command failed with exit code {e.returncode}")
-        print(f"STDOUT: {e.stdout}")
-        print(f"STDERR: {e.stderr}")
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+        if code == 0:
+            return True
+        print(f"ERROR: Step exited with code {code}")
         return False
     except Exception as e:
         print(f"ERROR: {e}")
@@ -53,32 +55,22 @@ def get_unique_user_tokens():
     
     conn = sqlite3.connect(str(db_path))
     c = conn.cursor()
-    
-    # Get all authors JSON from agents table
-    c.execute("SELECT authors FROM agents WHERE authors IS NOT NULL AND authors != ''")
-    results = c.fetchall()
+    c.arraysize = 1000
+
+    # Unnest and deduplicate the author tokens inside SQLite's JSON1
+    # extension instead of json.loads-ing every blob in Python; the
+    # json_valid guard mirrors the old JSONDecodeError skip
+    c.execute("""
+        SELECT DISTINCT je.key
+        FROM agents, json_each(agents.authors) je
+        WHERE authors IS NOT NULL AND authors != '' AND json_valid(authors)
+    """)
+    # Iterate the cursor directly instead of materializing a second copy
+    # of every row via fetchall before the list build
+    user_tokens = [token for (token,) in c]
     conn.close()
-    
-    user_tokens = set()
-    for (authors_json,) in results:
-        try:
-            authors = json.loads(authors_json)
-            # Extract user_token keys from the authors dictionary
-            user_tokens.update(authors.keys())
-        except json.JSONDecodeError:
-            continue
-    
-    return list(user_tokens)
 
-def create_temp_user_tokens_csv(user_tokens):
-    """Create a temporary CSV file with user tokens."""
-    import pandas as pd
-    project_root = get_project_root()
-    temp_file = project_root / 'temp_user_tokens.csv'
-    df = pd.DataFrame({'user_token': user_tokens})
-    df.to_csv(temp_file, index=False)
-    print(f"Created temporary CSV at: {temp_file}")
-    return str(temp_file)
+    return user_tokens
 
 def main():
     print("🚀 Starting data refresh process...")
@@ -94,9 +86,12 @@ def main():
     os.chdir(src_dir)
     
     try:
-        # Step 1: Fetch public agents
-        success = run_command(
-            ['python', 'pull_public_agents.py', '-p', 'public', '-n', '100'],
+        # Step 1: Fetch public agents (imported after the chdir so their
+        # relative data paths resolve the same as the old subprocess calls)
+        import pull_public_agents
+        success = run_step(
+            pull_public_agents.main,
+            ['-p', 'public', '-n', '100'],
             "Fetching public agents from agent.ai API"
         )
         
@@ -116,25 +111,17 @@ def main():
         
         print(f"Found {len(user_tokens)} unique user tokens")
         
-        # Step 3: Create temp CSV file with user tokens (always in project root)
-        temp_csv = create_temp_user_tokens_csv(user_tokens)
-        
-        # Step 4: Batch lookup HubSpot contacts (SUPER-FAST batch processing!)
-        os.chdir(src_dir)
-        # Use the absolute path to the temp CSV file
-        temp_csv_path = Path(temp_csv)
-        src_path = Path(src_dir)
-        temp_csv_relative = os.path.relpath(temp_csv_path, src_path)
-        success = run_command(
-            ['python', 'hubspot_contact_lookup_batch.py', '-f', temp_csv_relative, '--skip-existing', '--batch-size', '3'],
-            "Looking up HubSpot contact data using optimized batch processing"
+        # Step 3: Batch lookup HubSpot contacts, handing the token list
+        # straight to the in-process entry point — no temp CSV to write,
+        # re-parse and clean up now that the step is a function call
+        import hubspot_contact_lookup_batch
+        success = run_step(
+            hubspot_contact_lookup_batch.main,
+            ['--skip-existing'],
+            "Looking up HubSpot contact data using optimized batch processing",
+            tokens=user_tokens
         )
-        
-        # Cleanup temp file (use absolute path)
-        if os.path.exists(temp_csv):
-            os.remove(temp_csv)
-            print(f"Cleaned up temporary file: {temp_csv}")
-        
+
         if success:
             print(f"\n🎉 Data refresh completed successfully!")
             print("✅ Public agents updated")
@@ -1,5 +1,6 @@
-import sqlite3
-conn = sqlite3.connect('data/agents.db')
+from _db import open_db
+
+conn = open_db()
 cursor = conn.cursor()
 
 # Get Grant Program Builder agents with reviews
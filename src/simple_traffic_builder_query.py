@@ -1,26 +1,34 @@
 #!/usr/bin/env python3
-import pandas as pd
-import sqlite3
+import csv
 
-# Load paid traffic agents
-paid_traffic_df = pd.read_csv('paid_traffic_exclusion_list.csv')
-paid_traffic_ids = set(paid_traffic_df['agent_id'].tolist())
+from _db import open_db
 
 # Connect to database
-conn = sqlite3.connect('data/agents.db')
+conn = open_db()
 cursor = conn.cursor()
 
-# Get builder grant program agent IDs
-cursor.execute("SELECT agent_id FROM agents WHERE builder_grant_program = 1")
-builder_ids = set([row[0] for row in cursor.fetchall()])
+# Load the paid traffic ids into a temp table and let SQLite do the set
+# work against the indexed agents PK, instead of materializing two Python
+# sets and intersecting them by hand
+cursor.execute("CREATE TEMP TABLE pt (agent_id TEXT PRIMARY KEY)")
+with open('paid_traffic_exclusion_list.csv', newline='') as f:
+    reader = csv.DictReader(f)
+    cursor.executemany("INSERT OR IGNORE INTO pt VALUES (?)", ((row['agent_id'],) for row in reader))
 
-# Find overlap
-paid_traffic_and_builder = paid_traffic_ids.intersection(builder_ids)
-paid_traffic_not_builder = paid_traffic_ids - builder_ids
+cursor.execute("""
+    SELECT COUNT(*) AS total,
+           SUM(EXISTS(
+               SELECT 1 FROM agents a
+               WHERE a.agent_id = pt.agent_id AND a.builder_grant_program = 1
+           )) AS in_builder
+    FROM pt
+""")
+total_paid_traffic, in_builder = cursor.fetchone()
+not_in_builder = total_paid_traffic - (in_builder or 0)
 
-print(f"ANSWER: {len(paid_traffic_not_builder)} agents received paid traffic but are NOT in the builder program")
-print(f"Total paid traffic agents: {len(paid_traffic_ids)}")
-print(f"Paid traffic agents also in builder program: {len(paid_traffic_and_builder)}")
-print(f"Percentage NOT in builder program: {(len(paid_traffic_not_builder)/len(paid_traffic_ids))*100:.1f}%")
+print(f"ANSWER: {not_in_builder} agents received paid traffic but are NOT in the builder program")
+print(f"Total paid traffic agents: {total_paid_traffic}")
+print(f"Paid traffic agents also in builder program: {in_builder or 0}")
+print(f"Percentage NOT in builder program: {(not_in_builder/total_paid_traffic)*100:.1f}%")
 
-conn.close() 
\ No newline at end of file
+conn.close()
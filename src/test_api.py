@@ -1,27 +1,42 @@
+import argparse
 import os
+import sys
 import requests
 import json
 from dotenv import load_dotenv
 from datetime import datetime
+from urllib3.util.retry import Retry
 
 # Load environment variables
 load_dotenv()
 API_KEY = os.getenv("AGENT_AI_API_KEY")
 
+# Pooled session so repeated calls (or callers importing this module in a
+# loop) reuse the TLS connection instead of paying a handshake per request
+SESSION = requests.Session()
+SESSION.headers.update({
+    "Authorization": f"Bearer {API_KEY}",
+    "Content-Type": "application/json",
+    "Accept-Encoding": "gzip"
+})
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504])
+)
+SESSION.mount('https://', _adapter)
+
 def print_separator():
     print("\n" + "="*80 + "\n")
 
-def test_api_endpoint():
+def test_api_endpoint(verbose=False):
     if not API_KEY:
         print("Error: API key not found. Please set AGENT_AI_API_KEY in your .env file")
         return
 
     url = "https://api.agent.ai/api/v2/agents/list"
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
+
     params = {
         "status": "public",
         "limit": 5
@@ -30,13 +45,13 @@ def test_api_endpoint():
     print_separator()
     print("REQUEST DETAILS:")
     print(f"URL: {url}")
-    print(f"Headers: {json.dumps({k: v if k != 'Authorization' else '[REDACTED]' for k, v in headers.items()}, indent=2)}")
+    print(f"Headers: {json.dumps({k: v if k != 'Authorization' else '[REDACTED]' for k, v in SESSION.headers.items()}, indent=2)}")
     print(f"Parameters: {json.dumps(params, indent=2)}")
     print_separator()
     
     try:
         print("Sending request...")
-        response = requests.post(url, headers=headers, json=params)
+        response = SESSION.post(url, json=params, timeout=(3.05, 30))
         
         print("RESPONSE DETAILS:")
         print(f"Status Code: {response.status_code}")
@@ -51,9 +66,12 @@ def test_api_endpoint():
         try:
             response_data = response.json()
             print("\nParsed JSON Response:")
-            print(json.dumps(response_data, indent=2))
-            
-            if isinstance(response_data, dict):
+            # Stream the pretty-printed JSON to stdout rather than
+            # building the whole string in memory first
+            json.dump(response_data, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+
+            if verbose and isinstance(response_data, dict):
                 print("\nResponse Structure Analysis:")
                 for key, value in response_data.items():
                     if isinstance(value, list):
@@ -91,7 +109,12 @@ def test_api_endpoint():
             print("Redirect Error: Too many redirects.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Smoke test the agent.ai list endpoint')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Print the response structure analysis')
+    args = parser.parse_args()
+
     print(f"Starting API test at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    test_api_endpoint()
+    test_api_endpoint(verbose=args.verbose)
     print_separator()
     print("Test completed.")
\ No newline at end of file
@@ -16,10 +16,18 @@ METRICS:
 - Top 10 Agents and Top 10 Builders for each group
 """
 
-import sqlite3
 import json
 import pandas as pd
-from collections import defaultdict
+
+from _db import open_db
+
+# orjson parses the short authors blobs several times faster than the
+# stdlib decoder; fall back silently when it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 def load_exclusion_list():
     """Load the paid traffic agents exclusion list."""
@@ -30,236 +38,148 @@ def load_exclusion_list():
         print("❌ Exclusion list not found. Please run find_paid_traffic_agents.py first.")
         return set()
 
-def analyze_group_a(cursor):
-    """Analyze Group A: Grant Program Builders."""
-    print("🅰️ Analyzing Group A: Grant Program Builders...")
-    
-    # Get Grant Program Builder agents
-    cursor.execute("""
-        SELECT agent_id, authors, executions, reviews_count, reviews_score, name
-        FROM agents 
-        WHERE status = 'public' AND builder_grant_program = 1
+# Group membership: B is every public agent, A the grant-program subset,
+# C the organic subset (not grant-program, not on the paid-traffic list)
+GROUP_WHERE = {
+    'a': "status = 'public' AND builder_grant_program = 1",
+    'b': "status = 'public'",
+    'c': """status = 'public'
+        AND (builder_grant_program IS NULL OR builder_grant_program != 1)
+        AND agent_id NOT IN (SELECT agent_id FROM excluded_agents)""",
+}
+
+def load_exclusion_table(cursor, exclusion_list):
+    """Stage the exclusion list in an indexed temp table for SQL filtering."""
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS excluded_agents (agent_id TEXT PRIMARY KEY) WITHOUT ROWID")
+    cursor.execute("DELETE FROM excluded_agents")
+    cursor.executemany("INSERT OR IGNORE INTO excluded_agents VALUES (?)",
+                       [(agent_id,) for agent_id in exclusion_list])
+
+def _top_agents(cursor, where_sql):
+    """Only the top 10 by executions are ever displayed."""
+    cursor.execute(f"""
+        SELECT agent_id, name, executions, reviews_count, reviews_score
+        FROM agents
+        WHERE {where_sql}
+        ORDER BY COALESCE(executions, 0) DESC
+        LIMIT 10
     """)
-    
-    agents = cursor.fetchall()
-    
-    # Extract builders and stats
-    builder_stats = defaultdict(lambda: {
-        'agent_count': 0, 'total_executions': 0, 'total_reviews': 0, 
-        'total_weighted_rating': 0, 'agent_details': []
-    })
-    
-    builders = set()
-    total_executions = 0
-    total_reviews = 0
-    total_weighted_rating = 0
-    agent_details = []
-    
-    for agent_id, authors_json, executions, reviews_count, reviews_score, name in agents:
-        exec_count = executions or 0
-        review_count = reviews_count or 0
-        rating = reviews_score or 0
-        
-        total_executions += exec_count
-        total_reviews += review_count
-        if review_count > 0:
-            total_weighted_rating += rating * review_count
-        
-        agent_details.append({
+    return [
+        {
             'agent_id': agent_id,
             'name': name or 'Unnamed',
-            'executions': exec_count,
-            'reviews_count': review_count,
-            'average_rating': rating
-        })
-        
-        if authors_json:
-            try:
-                authors = json.loads(authors_json)
-                for user_token in authors.keys():
-                    builders.add(user_token)
-                    builder_stats[user_token]['agent_count'] += 1
-                    builder_stats[user_token]['total_executions'] += exec_count
-                    builder_stats[user_token]['total_reviews'] += review_count
-                    if review_count > 0:
-                        builder_stats[user_token]['total_weighted_rating'] += rating * review_count
-                    builder_stats[user_token]['agent_details'].append({
-                        'name': name or 'Unnamed',
-                        'executions': exec_count,
-                        'rating': rating
-                    })
-            except json.JSONDecodeError:
-                continue
-    
-    return {
-        'agents': agents,
-        'agent_count': len(agents),
-        'builder_count': len(builders),
-        'total_executions': total_executions,
-        'total_reviews': total_reviews,
-        'total_weighted_rating': total_weighted_rating,
-        'builder_stats': builder_stats,
-        'agent_details': agent_details
-    }
+            'executions': executions or 0,
+            'reviews_count': reviews_count or 0,
+            'average_rating': reviews_score or 0
+        }
+        for agent_id, name, executions, reviews_count, reviews_score in cursor.fetchall()
+    ]
+
+def analyze_all(cursor, exclusion_list):
+    """Analyze all three groups off a single pass over the public agents.
+
+    The old per-group functions each scanned the table (and decoded the
+    same authors blobs) independently. Here one conditional-aggregate
+    query produces every group's totals, and one attribution loop tagged
+    with per-row group flags decodes each authors JSON exactly once and
+    accumulates it into every group the row belongs to. The top-10
+    display rows remain cheap LIMIT 10 queries per group.
+    """
+    print("🅰️🅱️🅾️ Analyzing Groups A, B and C in one pass...")
+    load_exclusion_table(cursor, exclusion_list)
 
-def analyze_group_b(cursor):
-    """Analyze Group B: ALL Public Agents."""
-    print("🅱️ Analyzing Group B: ALL Public Agents...")
-    
-    # Get ALL public agents
     cursor.execute("""
-        SELECT agent_id, authors, executions, reviews_count, reviews_score, name
-        FROM agents 
-        WHERE status = 'public'
+        SELECT COUNT(*), COALESCE(SUM(ex), 0), COALESCE(SUM(rc), 0), COALESCE(SUM(wr), 0),
+               COUNT(CASE WHEN is_grant THEN 1 END),
+               COALESCE(SUM(CASE WHEN is_grant THEN ex END), 0),
+               COALESCE(SUM(CASE WHEN is_grant THEN rc END), 0),
+               COALESCE(SUM(CASE WHEN is_grant THEN wr END), 0),
+               COUNT(CASE WHEN is_organic THEN 1 END),
+               COALESCE(SUM(CASE WHEN is_organic THEN ex END), 0),
+               COALESCE(SUM(CASE WHEN is_organic THEN rc END), 0),
+               COALESCE(SUM(CASE WHEN is_organic THEN wr END), 0)
+        FROM (
+            SELECT COALESCE(executions, 0) AS ex,
+                   COALESCE(reviews_count, 0) AS rc,
+                   CASE WHEN reviews_count > 0
+                       THEN reviews_score * reviews_count ELSE 0 END AS wr,
+                   builder_grant_program = 1 AS is_grant,
+                   (builder_grant_program IS NULL OR builder_grant_program != 1)
+                       AND agent_id NOT IN (SELECT agent_id FROM excluded_agents) AS is_organic
+            FROM agents
+            WHERE status = 'public'
+        )
     """)
-    
-    agents = cursor.fetchall()
-    
-    # Extract builders and stats
-    builder_stats = defaultdict(lambda: {
-        'agent_count': 0, 'total_executions': 0, 'total_reviews': 0, 
-        'total_weighted_rating': 0, 'agent_details': []
-    })
-    
-    builders = set()
-    total_executions = 0
-    total_reviews = 0
-    total_weighted_rating = 0
-    agent_details = []
-    
-    for agent_id, authors_json, executions, reviews_count, reviews_score, name in agents:
-        exec_count = executions or 0
-        review_count = reviews_count or 0
-        rating = reviews_score or 0
-        
-        total_executions += exec_count
-        total_reviews += review_count
-        if review_count > 0:
-            total_weighted_rating += rating * review_count
-        
-        agent_details.append({
-            'agent_id': agent_id,
-            'name': name or 'Unnamed',
-            'executions': exec_count,
-            'reviews_count': review_count,
-            'average_rating': rating
-        })
-        
-        if authors_json:
-            try:
-                authors = json.loads(authors_json)
-                for user_token in authors.keys():
-                    builders.add(user_token)
-                    builder_stats[user_token]['agent_count'] += 1
-                    builder_stats[user_token]['total_executions'] += exec_count
-                    builder_stats[user_token]['total_reviews'] += review_count
-                    if review_count > 0:
-                        builder_stats[user_token]['total_weighted_rating'] += rating * review_count
-                    builder_stats[user_token]['agent_details'].append({
-                        'name': name or 'Unnamed',
-                        'executions': exec_count,
-                        'rating': rating
-                    })
-            except json.JSONDecodeError:
-                continue
-    
-    return {
-        'agents': agents,
-        'agent_count': len(agents),
-        'builder_count': len(builders),
-        'total_executions': total_executions,
-        'total_reviews': total_reviews,
-        'total_weighted_rating': total_weighted_rating,
-        'builder_stats': builder_stats,
-        'agent_details': agent_details
-    }
+    totals = cursor.fetchone()
 
-def analyze_group_c(cursor, exclusion_list):
-    """Analyze Group C: Organic Public Agents (excluding paid traffic + Grant Program Builder agents)."""
-    print("🅾️ Analyzing Group C: Organic Public Agents...")
-    
-    # Get all public agents
+    # Builder attribution still needs Python for the authors JSON, but
+    # each blob is decoded once and credited to every matching group.
+    # The loop only appends to flat columns; the actual reduction happens
+    # in one vectorized groupby below instead of per-row dict updates
+    col_group, col_token, col_exec, col_reviews, col_weighted = [], [], [], [], []
     cursor.execute("""
-        SELECT agent_id, authors, executions, reviews_count, reviews_score, name
-        FROM agents 
-        WHERE status = 'public'
+        SELECT authors, executions, reviews_count, reviews_score,
+               builder_grant_program = 1 AS is_grant,
+               (builder_grant_program IS NULL OR builder_grant_program != 1)
+                   AND agent_id NOT IN (SELECT agent_id FROM excluded_agents) AS is_organic
+        FROM agents
+        WHERE status = 'public' AND authors IS NOT NULL
     """)
-    
-    all_agents = cursor.fetchall()
-    
-    # Filter out paid traffic and Grant Program Builder agents
-    filtered_agents = []
-    for agent_id, authors_json, executions, reviews_count, reviews_score, name in all_agents:
-        # Skip paid traffic agents
-        if agent_id in exclusion_list:
-            continue
-        
-        # Skip Grant Program Builder agents
-        cursor.execute("SELECT builder_grant_program FROM agents WHERE agent_id = ?", (agent_id,))
-        result = cursor.fetchone()
-        if result and result[0] == 1:
-            continue
-        
-        filtered_agents.append((agent_id, authors_json, executions, reviews_count, reviews_score, name))
-    
-    # Extract builders and stats
-    builder_stats = defaultdict(lambda: {
-        'agent_count': 0, 'total_executions': 0, 'total_reviews': 0, 
-        'total_weighted_rating': 0, 'agent_details': []
-    })
-    
-    builders = set()
-    total_executions = 0
-    total_reviews = 0
-    total_weighted_rating = 0
-    agent_details = []
-    
-    for agent_id, authors_json, executions, reviews_count, reviews_score, name in filtered_agents:
+    cursor.arraysize = 1000
+    for authors_json, executions, reviews_count, reviews_score, is_grant, is_organic in cursor:
         exec_count = executions or 0
         review_count = reviews_count or 0
         rating = reviews_score or 0
-        
-        total_executions += exec_count
-        total_reviews += review_count
-        if review_count > 0:
-            total_weighted_rating += rating * review_count
-        
-        agent_details.append({
-            'agent_id': agent_id,
-            'name': name or 'Unnamed',
-            'executions': exec_count,
-            'reviews_count': review_count,
-            'average_rating': rating
-        })
-        
-        if authors_json:
-            try:
-                authors = json.loads(authors_json)
-                for user_token in authors.keys():
-                    builders.add(user_token)
-                    builder_stats[user_token]['agent_count'] += 1
-                    builder_stats[user_token]['total_executions'] += exec_count
-                    builder_stats[user_token]['total_reviews'] += review_count
-                    if review_count > 0:
-                        builder_stats[user_token]['total_weighted_rating'] += rating * review_count
-                    builder_stats[user_token]['agent_details'].append({
-                        'name': name or 'Unnamed',
-                        'executions': exec_count,
-                        'rating': rating
-                    })
-            except json.JSONDecodeError:
-                continue
-    
-    return {
-        'agents': filtered_agents,
-        'agent_count': len(filtered_agents),
-        'builder_count': len(builders),
-        'total_executions': total_executions,
-        'total_reviews': total_reviews,
-        'total_weighted_rating': total_weighted_rating,
-        'builder_stats': builder_stats,
-        'agent_details': agent_details
-    }
+        try:
+            authors = _json_loads(authors_json)
+        except ValueError:
+            # covers json.JSONDecodeError and orjson.JSONDecodeError
+            continue
+
+        groups = ['b']
+        if is_grant:
+            groups.append('a')
+        if is_organic:
+            groups.append('c')
+
+        # Branchless: a zero review count zeroes the contribution anyway
+        weighted = rating * review_count
+        for user_token in authors.keys():
+            for group in groups:
+                col_group.append(group)
+                col_token.append(user_token)
+                col_exec.append(exec_count)
+                col_reviews.append(review_count)
+                col_weighted.append(weighted)
+
+    attributions = pd.DataFrame({
+        'group': col_group,
+        'user_token': col_token,
+        'executions': col_exec,
+        'reviews': col_reviews,
+        'weighted': col_weighted
+    })
+    builder_stats = attributions.groupby(['group', 'user_token'], sort=False).agg(
+        agent_count=('executions', 'size'),
+        total_executions=('executions', 'sum'),
+        total_reviews=('reviews', 'sum'),
+        total_weighted_rating=('weighted', 'sum')
+    ).reset_index()
+
+    results = {}
+    for group, offset in (('b', 0), ('a', 4), ('c', 8)):
+        agent_count, total_executions, total_reviews, total_weighted_rating = totals[offset:offset + 4]
+        group_builders = builder_stats[builder_stats['group'] == group].drop(columns='group')
+        results[group] = {
+            'agent_count': agent_count,
+            'builder_count': len(group_builders),
+            'total_executions': total_executions,
+            'total_reviews': total_reviews,
+            'total_weighted_rating': total_weighted_rating,
+            'builder_stats': group_builders,
+            'agent_details': _top_agents(cursor, GROUP_WHERE[group])
+        }
+    return results
 
 def print_group_summary(group_name, group_data, total_public_agents):
     """Print summary statistics for a group."""
@@ -287,10 +207,9 @@ def print_top_agents(group_name, agent_details):
     print(f"{'Rank':<5} {'Agent Name':<50} {'Executions':<12} {'Avg Rating':<10}")
     print("-" * 100)
     
-    # Sort by executions
-    sorted_agents = sorted(agent_details, key=lambda x: x['executions'], reverse=True)
-    
-    for i, agent in enumerate(sorted_agents[:10], 1):
+    # agent_details already arrives as the top 10 ordered by executions
+    # (ORDER BY .. LIMIT 10 in _top_agents); no re-sort needed
+    for i, agent in enumerate(agent_details, 1):
         name = agent['name'][:47] + "..." if len(agent['name']) > 50 else agent['name']
         print(f"{i:<5} {name:<50} {agent['executions']:<12,} {agent['average_rating']:<10.2f}")
 
@@ -300,13 +219,12 @@ def print_top_builders(group_name, builder_stats):
     print("-" * 110)
     print(f"{'Rank':<5} {'User Token':<35} {'Agents':<8} {'Executions':<12} {'Avg Rating':<10}")
     print("-" * 110)
-    
-    # Sort by agent count
-    sorted_builders = sorted(builder_stats.items(), key=lambda x: x[1]['agent_count'], reverse=True)
-    
-    for i, (user_token, stats) in enumerate(sorted_builders[:10], 1):
-        avg_rating = (stats['total_weighted_rating'] / stats['total_reviews']) if stats['total_reviews'] > 0 else 0
-        print(f"{i:<5} {user_token:<35} {stats['agent_count']:<8} {stats['total_executions']:<12,} {avg_rating:<10.2f}")
+
+    # Partial selection of the display rows instead of a full sort
+    top_builders = builder_stats.nlargest(10, 'agent_count')
+    for i, row in enumerate(top_builders.itertuples(index=False), 1):
+        avg_rating = (row.total_weighted_rating / row.total_reviews) if row.total_reviews > 0 else 0
+        print(f"{i:<5} {row.user_token:<35} {row.agent_count:<8} {row.total_executions:<12,} {avg_rating:<10.2f}")
 
 def main():
     """Main comparison analysis."""
@@ -319,23 +237,31 @@ def main():
         print("❌ Cannot proceed without exclusion list.")
         return
     
-    # Connect to database
-    db_path = 'data/agents.db'
-    conn = sqlite3.connect(db_path)
+    # Connect writable so the composite index below can be created on
+    # first run; the shared helper still applies the read-tuned pragmas
+    conn = open_db(ro=False)
     cursor = conn.cursor()
+
+    # (status, grant flag, executions) lets the group filters run as
+    # index range scans and serves ORDER BY executions LIMIT 10 straight
+    # off the index order
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_agents_status_grant
+        ON agents(status, builder_grant_program, executions DESC)
+    """)
+    cursor.execute("ANALYZE agents")
     
-    # Get total public agents count
-    cursor.execute("SELECT COUNT(*) FROM agents WHERE status = 'public'")
-    total_public_agents = cursor.fetchone()[0]
-    
-    print(f"Total public agents in database: {total_public_agents:,}")
     print(f"Paid traffic exclusion list: {len(exclusion_list)} agents")
-    
-    # Analyze each group
-    group_a = analyze_group_a(cursor)
-    group_b = analyze_group_b(cursor)
-    group_c = analyze_group_c(cursor, exclusion_list)
-    
+
+    # Analyze all three groups with one shared scan; Group B covers every
+    # public agent by construction, so its count doubles as the total and
+    # the old standalone SELECT COUNT(*) is gone
+    groups = analyze_all(cursor, exclusion_list)
+    group_a, group_b, group_c = groups['a'], groups['b'], groups['c']
+    total_public_agents = group_b['agent_count']
+
+    print(f"Total public agents in database: {total_public_agents:,}")
+
     conn.close()
     
     # Print group summaries
@@ -13,15 +13,24 @@ python update_grant_program_builder.py -u 94dfb55e751c4d35b485872a31d63e33
 python update_grant_program_builder.py -u 94dfb55e751c4d35b485872a31d63e33 -a lt8gzzc4s59qym06
 """
 
-import sqlite3
 import json
 import argparse
 
+from _db import open_db
+
+# orjson decodes the authors blobs several times faster than stdlib
+# json; fall back silently when it isn't installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 def check_and_update_builder(user_token, target_agent_id=None):
     """Check and update grant program builder status for a user."""
     
-    db_path = 'data/agents.db'
-    conn = sqlite3.connect(db_path)
+    # Writable connection through the shared helper (WAL + tuned cache)
+    conn = open_db(ro=False)
     cursor = conn.cursor()
     
     print(f"🔍 Searching for agents by user: {user_token}")
@@ -39,7 +48,7 @@ def check_and_update_builder(user_token, target_agent_id=None):
             
             if authors_json:
                 try:
-                    authors = json.loads(authors_json)
+                    authors = _json_loads(authors_json)
                     print(f"   Authors: {list(authors.keys())}")
                     
                     if user_token in authors:
@@ -47,33 +56,33 @@ def check_and_update_builder(user_token, target_agent_id=None):
                     else:
                         print(f"❌ User {user_token} is NOT an author of this agent")
                         print(f"   Current authors: {list(authors.keys())}")
-                except json.JSONDecodeError:
+                except ValueError:
+                    # covers json.JSONDecodeError and orjson.JSONDecodeError
                     print(f"   Authors JSON parsing failed: {authors_json}")
             else:
                 print(f"   No authors data")
         else:
             print(f"❌ Target agent {target_agent_id} not found")
     
-    # Find all agents by this user
-    cursor.execute("SELECT agent_id, name, status, authors, builder_grant_program FROM agents")
-    all_agents = cursor.fetchall()
-    
-    user_agents = []
-    
-    for agent_id, name, status, authors_json, builder_status in all_agents:
-        if authors_json:
-            try:
-                authors = json.loads(authors_json)
-                if user_token in authors:
-                    user_agents.append({
-                        'agent_id': agent_id,
-                        'name': name,
-                        'status': status,
-                        'builder_grant_program': builder_status
-                    })
-            except json.JSONDecodeError:
-                continue
-    
+    # Find all agents by this user with one query — the author check runs
+    # inside SQLite's json_each instead of decoding every row in Python
+    cursor.execute("""
+        SELECT agent_id, name, status, builder_grant_program
+        FROM agents
+        WHERE authors IS NOT NULL AND json_valid(authors)
+        AND EXISTS (SELECT 1 FROM json_each(authors) WHERE json_each.key = ?)
+    """, (user_token,))
+
+    user_agents = [
+        {
+            'agent_id': agent_id,
+            'name': name,
+            'status': status,
+            'builder_grant_program': builder_status
+        }
+        for agent_id, name, status, builder_status in cursor.fetchall()
+    ]
+
     print(f"\n📊 Found {len(user_agents)} agents by user {user_token}:")
     
     if not user_agents:
@@ -87,14 +96,17 @@ def check_and_update_builder(user_token, target_agent_id=None):
     # Update all agents by this user to be Grant Program Builder agents
     print(f"\n🔄 Updating all agents by {user_token} to Grant Program Builder status...")
     
-    for agent in user_agents:
+    # One UPDATE with an IN list inside a single transaction: the writes
+    # batch together and the WAL syncs once instead of per agent
+    ids = [agent['agent_id'] for agent in user_agents]
+    with conn:
         cursor.execute(
-            "UPDATE agents SET builder_grant_program = 1 WHERE agent_id = ?",
-            (agent['agent_id'],)
+            f"UPDATE agents SET builder_grant_program = 1 WHERE agent_id IN ({','.join('?' * len(ids))})",
+            ids
         )
+    for agent in user_agents:
         print(f"✅ Updated {agent['agent_id']} - {agent['name']}")
-    
-    conn.commit()
+
     conn.close()
     
     print(f"\n🎯 Successfully updated {len(user_agents)} agents for Grant Program Builder: {user_token}")
@@ -37,36 +37,68 @@ This is useful for analyzing user productivity and understanding what agents
 specific users have built on the platform.
 """
 
-import sqlite3
 import argparse
 import sys
 
+from _db import open_db
+
+def ensure_agent_authors(conn):
+    """Materialize authors into an indexed user_token -> agent_id table.
+
+    The old EXISTS(json_each(authors)) lookup forced a full table scan
+    with a JSON parse per row on every invocation. This side table pays
+    that cost once — entirely inside SQLite via json_each — and turns
+    each lookup into an index seek. It is rebuilt only when the number
+    of agents with a valid authors blob has changed since the last build.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS agent_authors (
+            user_token TEXT,
+            agent_id TEXT,
+            PRIMARY KEY (user_token, agent_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("SELECT COUNT(*) FROM agents WHERE authors IS NOT NULL AND json_valid(authors)")
+    source_count = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(DISTINCT agent_id) FROM agent_authors")
+    built_count = cursor.fetchone()[0]
+    if built_count != source_count:
+        cursor.execute("DELETE FROM agent_authors")
+        cursor.execute("""
+            INSERT OR IGNORE INTO agent_authors (user_token, agent_id)
+            SELECT je.key, a.agent_id
+            FROM agents a, json_each(a.authors) je
+            WHERE a.authors IS NOT NULL AND json_valid(a.authors)
+        """)
+        conn.commit()
+
 def get_user_agents(user_token, status=None, db_path='data/agents.db'):
     """Get all agents authored by a specific user token."""
-    conn = sqlite3.connect(db_path)
+    # Writable connection so ensure_agent_authors can rebuild its table
+    conn = open_db(db_path, ro=False)
+    ensure_agent_authors(conn)
     cursor = conn.cursor()
-    
-    # Query to find all agents where the user_token is a key in the authors JSON
+
+    # Index seek on the side table replaces the per-row json_each scan
     base_query = """
-    SELECT name, agent_id_human, agent_id, created_at, executions
-    FROM agents
-    WHERE EXISTS (
-        SELECT 1 FROM json_each(authors) 
-        WHERE json_each.key = ?
-    )
+    SELECT a.name, a.agent_id_human, a.agent_id, a.created_at, a.executions
+    FROM agents a
+    JOIN agent_authors aa ON aa.agent_id = a.agent_id
+    WHERE aa.user_token = ?
     """
-    
+
     # Add status filter if provided
     if status:
-        query = base_query + " AND status = ? ORDER BY created_at DESC;"
+        query = base_query + " AND a.status = ? ORDER BY a.created_at DESC;"
         cursor.execute(query, (user_token, status))
     else:
-        query = base_query + " ORDER BY created_at DESC;"
+        query = base_query + " ORDER BY a.created_at DESC;"
         cursor.execute(query, (user_token,))
-    
+
     results = cursor.fetchall()
     conn.close()
-    
+
     return results
 
 def print_user_briefing(user_token, agents, status=None):
@@ -3,10 +3,11 @@
 Verification script to test that all database connections point to the correct agents.db file.
 """
 
-import sqlite3
 import os
 import sys
 
+from _db import open_db
+
 def test_database_connection():
     """Test that the database path is correct and accessible."""
     
@@ -28,7 +29,9 @@ def test_database_connection():
     
     # Test connection
     try:
-        conn = sqlite3.connect(db_path)
+        # Same read-tuned connection the analysis scripts use, so this
+        # verifies the path and the pragmas in one go
+        conn = open_db(db_path)
         cursor = conn.cursor()
         
         # Test basic query
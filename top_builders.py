@@ -1,60 +1,42 @@
 import sqlite3
-import json
-from collections import Counter
 
-def get_top_builders():
+def get_builders_ranked(offset=20, limit=20):
     """
-    Find all builders by number of public agents created.
+    Rank builders by number of public agents created, one page at a time.
+
+    The counting and ranking run inside SQLite: json_each unnests the
+    authors dict (keys are user tokens, values hold the display info) so
+    the whole aggregation is a single scan with no Python-side JSON
+    decoding, and LIMIT/OFFSET returns only the requested slice.
     """
     conn = sqlite3.connect('data/agents.db')
     c = conn.cursor()
-    
-    # Get all public agents
-    c.execute('SELECT authors FROM agents WHERE status = "public"')
-    agents = c.fetchall()
-    
-    # Count agents per author
-    author_counts = Counter()
-    author_info = {}
-    
-    for (authors_json,) in agents:
-        try:
-            authors = json.loads(authors_json) if authors_json else {}
-            
-            for user_token, info in authors.items():
-                author_counts[user_token] += 1
-                # Store author info for display
-                if user_token not in author_info:
-                    author_info[user_token] = {
-                        'name': info.get('name', 'Unknown'),
-                        'twitter': info.get('twitter_username', ''),
-                        'avatar': info.get('avatar', '')
-                    }
-        except json.JSONDecodeError:
-            continue
-    
+
+    c.execute("""
+        SELECT je.key AS user_token,
+               COUNT(*) AS agent_count,
+               MAX(json_extract(je.value, '$.name')),
+               MAX(json_extract(je.value, '$.twitter_username'))
+        FROM agents a, json_each(a.authors) je
+        WHERE a.status = 'public'
+        AND a.authors IS NOT NULL AND json_valid(a.authors)
+        GROUP BY je.key
+        ORDER BY agent_count DESC
+        LIMIT ? OFFSET ?
+    """, (limit, offset))
+    builders = c.fetchall()
     conn.close()
-    
-    # Get all builders sorted by count
-    all_builders = author_counts.most_common()
-    
-    return all_builders, author_info
+
+    return builders
 
 def main():
     print("Builders Ranked 21-40 by Number of Public Agents Created")
     print("=" * 80)
-    
-    all_builders, author_info = get_top_builders()
-    
-    # Get builders 21-40 (indices 20-39)
-    builders_21_40 = all_builders[20:40]
-    
-    for i, (user_token, count) in enumerate(builders_21_40, 21):
-        info = author_info.get(user_token, {})
-        name = info.get('name', 'Unknown')
-        twitter = info.get('twitter', '')
-        
-        print(f"{i:2d}. {name}")
+
+    builders = get_builders_ranked(offset=20, limit=20)
+
+    for i, (user_token, count, name, twitter) in enumerate(builders, 21):
+        print(f"{i:2d}. {name or 'Unknown'}")
         print(f"    User Token: {user_token}")
         if twitter:
             print(f"    Twitter: @{twitter}")
@@ -62,4 +44,4 @@ def main():
         print("-" * 80)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()